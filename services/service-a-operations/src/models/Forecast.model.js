@@ -30,4 +30,10 @@ const ForecastSchema = new mongoose.Schema({
   timestamps: false // Service B manages its own timestamps
 });
 
+// 📌 RULE: Compound Index backing the per-region forecast read
+// Example Query: "Give me the next forecasts for Region X, oldest first"
+// Unique: Service B upserts one forecast per (region, day) on this key.
+// Must match the options declared by Service B's ensure_olap_indexes.
+ForecastSchema.index({ region_id: 1, forecast_date: 1 }, { unique: true });
+
 export default mongoose.model('Forecast', ForecastSchema);  
\ No newline at end of file
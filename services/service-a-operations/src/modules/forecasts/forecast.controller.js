@@ -1,5 +1,60 @@
 import Forecast from '../../models/Forecast.model.js';
 
+// Response shape consumed by the dashboard chart (everything else stays on the server)
+const FORECAST_PROJECTION = {
+  region_id: 1,
+  forecast_date: 1,
+  predicted_level: 1,
+  model_version: 1,
+  horizon_step: 1
+};
+
+// ==========================================
+// 🧠 In-Process Forecast Cache
+// ==========================================
+// Forecasts are rewritten by Service B at most once per pipeline run, while the
+// dashboard re-requests them on every refresh. Entries are keyed by
+// (region, UTC day) and expire after a short TTL, because Service B writes
+// straight to MongoDB and cannot invalidate this cache.
+const CACHE_TTL_MS = 5 * 60 * 1000;
+const CACHE_MAX_ENTRIES = 512;
+const forecastCache = new Map(); // key -> { expiresAt, forecasts }
+
+const cacheKey = (regionId) => `${regionId}:${new Date().toISOString().slice(0, 10)}`;
+
+const fetchForecasts = async (regionId) => {
+  // Pipeline: $match first (index prefix), sort + limit on the
+  // (region_id, forecast_date) index, then shape documents server-side.
+  return Forecast.aggregate([
+    { $match: { region_id: regionId } },
+    { $sort: { forecast_date: 1 } }, // Oldest first
+    { $limit: 14 },
+    { $project: FORECAST_PROJECTION }
+  ]);
+};
+
+const getCachedForecasts = async (regionId) => {
+  const key = cacheKey(regionId);
+  const hit = forecastCache.get(key);
+
+  if (hit && hit.expiresAt > Date.now()) {
+    // Refresh recency (Map keeps insertion order -> oldest entry is evicted first)
+    forecastCache.delete(key);
+    forecastCache.set(key, hit);
+    return hit.forecasts;
+  }
+
+  const forecasts = await fetchForecasts(regionId);
+
+  forecastCache.delete(key);
+  forecastCache.set(key, { expiresAt: Date.now() + CACHE_TTL_MS, forecasts });
+  if (forecastCache.size > CACHE_MAX_ENTRIES) {
+    forecastCache.delete(forecastCache.keys().next().value);
+  }
+
+  return forecasts;
+};
+
 /**
  * @desc    Get 7-day forecast for a specific region
  * @route   GET /api/v1/forecasts/:regionId
@@ -9,16 +64,7 @@ export const getForecastsByRegion = async (req, res, next) => {
   try {
     const { regionId } = req.params;
 
-    // --- DEBUG FIX: Removed Date Filter ---
-    // We want to see ALL forecasts available for this region to ensure
-    // data is flowing, regardless of whether it's "today" or "tomorrow".
-    
-    const forecasts = await Forecast.find({ 
-      region_id: regionId
-      // forecast_date: { $gte: today }  <-- COMMENTED OUT STRICT FILTER
-    })
-    .sort({ forecast_date: 1 }) // Oldest first
-    .limit(14);                 // Show us everything
+    const forecasts = await getCachedForecasts(regionId);
 
     res.status(200).json({
       success: true,
@@ -28,4 +74,4 @@ export const getForecastsByRegion = async (req, res, next) => {
   } catch (err) {
     next(err);
   }
-};
\ No newline at end of file
+};
@@ -1,8 +1,10 @@
 import os
 import logging
-from pymongo import MongoClient, ReadPreference
+import threading
+from pymongo import ASCENDING, MongoClient
 from pymongo.database import Database
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from pymongo.read_preferences import SecondaryPreferred
+from pymongo.errors import ConnectionFailure, OperationFailure, ServerSelectionTimeoutError
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -11,6 +13,51 @@ load_dotenv()
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Connection tuning
+# - Bounded pool: a job holds only a few cursors at once; extra sockets are server-side cost
+#   (~1MB each). Sizes can be raised per deployment for multi-worker ETL.
+# - minPoolSize: sockets are opened in the background right after connect (pre-warmed).
+# - maxIdleTimeMS: idle sockets are recycled instead of lingering on the server.
+# - socketTimeoutMS: a stuck operation fails instead of hanging the job indefinitely.
+#   Applies to every job sharing this client; MONGO_SOCKET_TIMEOUT_MS=0 disables it
+#   (e.g. for a long backfill or training scan).
+# - waitQueueTimeoutMS: fail fast when the pool is exhausted rather than queueing forever.
+# - compressors: wire compression for bulk ETL cursor batches. The server picks the
+#   first one it also supports; zlib (stdlib) is the fallback if zstd/snappy are absent.
+SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+
+# Server-side budget (maxTimeMS) for extract cursors and aggregations. It must expire
+# before the socket timeout: otherwise the client gives up first with NetworkTimeout
+# while the server keeps working, and retryReads can start the same read again.
+EXTRACT_MAX_TIME_MS = int(os.getenv("MONGO_MAX_TIME_MS", "25000"))
+
+if SOCKET_TIMEOUT_MS and EXTRACT_MAX_TIME_MS >= SOCKET_TIMEOUT_MS:
+    raise ValueError(
+        f"MONGO_MAX_TIME_MS ({EXTRACT_MAX_TIME_MS}) must be below "
+        f"MONGO_SOCKET_TIMEOUT_MS ({SOCKET_TIMEOUT_MS}) for the server-side limit to apply."
+    )
+
+MONGO_CLIENT_OPTIONS = {
+    "serverSelectionTimeoutMS": 5000,
+    "connectTimeoutMS": 5000,
+    "socketTimeoutMS": SOCKET_TIMEOUT_MS,
+    "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "20")),
+    "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "4")),
+    "maxIdleTimeMS": 60000,
+    "waitQueueTimeoutMS": 2000,
+    "retryReads": True,
+    "compressors": "zstd,snappy,zlib",
+    "zlibCompressionLevel": 6,
+}
+
+# OLTP read routing: prefer secondaries tagged for analytics, then any secondary,
+# never one lagging more than 2 minutes; the primary only if no secondary qualifies.
+# Replica members opt in via tags, e.g. rs.conf().members[n].tags = { workload: "analytics" }.
+OLTP_READ_PREFERENCE = SecondaryPreferred(
+    tag_sets=[{"workload": "analytics"}, {}],
+    max_staleness=120
+)
+
 class AnalyticsMongoClient:
     """
     Wrapper for MongoDB connection handling specific to Service B (Analytics).
@@ -25,10 +72,25 @@ class AnalyticsMongoClient:
         self._olap_db_name = os.getenv("ANALYTICS_DB_NAME", "groundwater_analytics")
         
         self._client: MongoClient = None
+        # Database handles are built once per connection and reused by every caller
+        self._oltp_db: Database = None
+        self._olap_db: Database = None
+        # Serializes connect()/close() so concurrent extract threads share one client/pool
+        self._lock = threading.Lock()
 
     def connect(self) -> None:
         """
         Establishes the MongoDB connection with DEBUG logging.
+        Thread-safe and idempotent: callers racing here get the same client.
+        """
+        with self._lock:
+            if self._client:
+                return
+            self._connect()
+
+    def _connect(self) -> None:
+        """
+        Opens and verifies the client (caller holds self._lock).
         """
         if not self._uri:
             raise ValueError("MONGO_URI environment variable is not set.")
@@ -44,36 +106,69 @@ class AnalyticsMongoClient:
         logger.info(f"🎯 TARGET DATABASE: {self._olap_db_name}")
 
         try:
-            self._client = MongoClient(
-                self._uri, 
-                serverSelectionTimeoutMS=5000,
-                connectTimeoutMS=5000
-            )
+            client = MongoClient(self._uri, **MONGO_CLIENT_OPTIONS)
             
-            # Verify connection
-            info = self._client.server_info()
-            logger.info(f"✅ Connected Successfully! Server Version: {info.get('version')}")
+            # Verify connection (ping is the cheapest round-trip; server_info runs buildInfo)
+            client.admin.command("ping")
+            logger.info("✅ Connected Successfully!")
+
+            # Cache Database handles (avoids rebuilding them on every lookup)
+            self._oltp_db = client.get_database(
+                self._oltp_db_name,
+                read_preference=OLTP_READ_PREFERENCE
+            )
+            self._olap_db = client.get_database(self._olap_db_name)
+
+            self.ensure_olap_indexes()
+
+            # Published last: the getters' lock-free fast path checks _client,
+            # so the handles above must already be in place when it is set
+            self._client = client
             
         except (ConnectionFailure, ServerSelectionTimeoutError) as e:
             logger.critical(f"❌ Failed to connect to MongoDB: {e}")
+            client.close()
             raise e
 
+    def ensure_olap_indexes(self) -> None:
+        """
+        Declares the compound indexes backing the hot OLAP reads (idempotent).
+        
+        - daily_forecasts: per-region forecast reads sorted by forecast_date.
+          Unique: it is also the upsert key of the forecast writer.
+        - region_feature_store: per-region history/latest-row lookups sorted by date.
+        
+        Default index names and options are kept so they match the ones
+        Service A's Mongoose schema declares for the same keys. A deployment
+        that still has the older non-unique forecast index keeps it (the
+        conflict is logged) until that index is dropped once by hand.
+        """
+        index_specs = [
+            ("daily_forecasts", [("region_id", ASCENDING), ("forecast_date", ASCENDING)], {"unique": True}),
+            ("region_feature_store", [("region_id", ASCENDING), ("date", ASCENDING)], {}),
+        ]
+        for collection, keys, options in index_specs:
+            # One at a time, so a conflict on one index doesn't skip the others
+            try:
+                self._olap_db[collection].create_index(keys, **options)
+            except OperationFailure as e:
+                # Missing indexes degrade query plans but must not block the pipeline
+                logger.warning(f"⚠️ Could not ensure OLAP index on '{collection}': {e}")
+
     def get_oltp_db(self) -> Database:
         """
         Returns the handle for Service A (Operational Data).
         
         ENFORCEMENT:
-        - Configured with ReadPreference.SECONDARY_PREFERRED.
+        - Configured with SecondaryPreferred (see OLTP_READ_PREFERENCE).
         - This signals intent to read from replicas (scaling reads) 
           and avoids impacting the Primary node used by Service A for writes.
+        - Secondaries tagged workload=analytics are tried first.
         """
         if not self._client:
             self.connect()
             
-        return self._client.get_database(
-            self._oltp_db_name, 
-            read_preference=ReadPreference.SECONDARY_PREFERRED
-        )
+        return self._oltp_db
 
     def get_olap_db(self) -> Database:
         """
@@ -86,13 +181,18 @@ class AnalyticsMongoClient:
         if not self._client:
             self.connect()
             
-        return self._client.get_database(self._olap_db_name)
+        return self._olap_db
 
     def close(self):
         """Closes the connection."""
-        if self._client:
-            self._client.close()
-            logger.info("MongoDB connection closed.")
+        with self._lock:
+            if self._client:
+                self._client.close()
+                # Reset so the next get_*_db() call reconnects instead of reusing a closed client
+                self._client = None
+                self._oltp_db = None
+                self._olap_db = None
+                logger.info("MongoDB connection closed.")
 
 # Singleton instance for easy import across modules
 mongo_client = AnalyticsMongoClient()
\ No newline at end of file
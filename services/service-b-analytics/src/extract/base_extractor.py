@@ -1,6 +1,28 @@
 from abc import ABC, abstractmethod
+from datetime import datetime
 from typing import Any, Dict, List, Optional, Iterator
 from pymongo.database import Database
+from src.config.mongo_client import EXTRACT_MAX_TIME_MS
+
+# Cursor batch sizes per source collection (documents per getMore round-trip).
+# - Time-series scans: larger batches mean fewer round-trips. The server still
+#   caps each batch at 16MiB, so that is the most a batch can buffer client-side.
+# - Dimension tables: small enough that one batch usually holds the whole set.
+DEFAULT_BATCH_SIZES: Dict[str, int] = {
+    "water_readings": 5000,
+    "rainfall": 5000,
+    "regions": 200,
+}
+FALLBACK_BATCH_SIZE = 1000
+
+def build_timerange_match(field: str, start: datetime, end: datetime) -> Dict[str, Any]:
+    """
+    Standard half-open [start, end) range filter on an indexed date field.
+    
+    Use it as the find() filter or inside the leading $match stage of a pipeline,
+    so every extract query hits the index the same way.
+    """
+    return {field: {"$gte": start, "$lt": end}}
 
 class BaseExtractor(ABC):
     """
@@ -23,7 +45,7 @@ class BaseExtractor(ABC):
         collection: str, 
         query: Dict[str, Any], 
         projection: Optional[Dict[str, int]] = None,
-        batch_size: int = 1000
+        batch_size: Optional[int] = None
     ) -> Iterator[Dict[str, Any]]:
         """
         Yields data in batches from the specified collection.
@@ -33,6 +55,8 @@ class BaseExtractor(ABC):
             query: MongoDB filter dictionary.
             projection: Fields to include/exclude (0 or 1).
             batch_size: Number of documents to yield per iteration (cursor batching).
+                        Defaults to DEFAULT_BATCH_SIZES for the collection;
+                        0 lets the server size batches (up to 16MiB).
             
         Returns:
             Iterator yielding dictionary representations of documents.
@@ -43,13 +67,26 @@ class MongoExtractor(BaseExtractor):
     """
     Concrete implementation for MongoDB extraction.
     """
+
+    def __init__(self, db: Database, max_time_ms: Optional[int] = EXTRACT_MAX_TIME_MS):
+        """
+        Args:
+            db (Database): The source database handle (Read-Only).
+            max_time_ms: Server-side time budget per cursor. On overrun MongoDB
+                         kills the operation and the pooled socket is returned,
+                         instead of the scan pinning it. None disables the limit.
+                         Defaults to EXTRACT_MAX_TIME_MS, which is kept below
+                         the client's socketTimeoutMS (see mongo_client).
+        """
+        super().__init__(db)
+        self.max_time_ms = max_time_ms
     
     def fetch_batch(
         self, 
         collection: str, 
         query: Dict[str, Any], 
         projection: Optional[Dict[str, int]] = None,
-        batch_size: int = 1000
+        batch_size: Optional[int] = None
     ) -> Iterator[Dict[str, Any]]:
         
         # Safety Check: Ensure we aren't accidentally passing an empty query 
@@ -57,7 +94,52 @@ class MongoExtractor(BaseExtractor):
         if query is None:
             query = {}
 
+        if batch_size is None:
+            batch_size = DEFAULT_BATCH_SIZES.get(collection, FALLBACK_BATCH_SIZE)
+
         cursor = self.db[collection].find(query, projection).batch_size(batch_size)
+        if self.max_time_ms is not None:
+            cursor = cursor.max_time_ms(self.max_time_ms)
+        
+        for document in cursor:
+            yield document
+
+    def aggregate(
+        self,
+        collection: str,
+        pipeline: List[Dict[str, Any]],
+        batch_size: Optional[int] = None,
+        allow_disk_use: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Runs an aggregation pipeline server-side and yields the result documents.
+        
+        The pipeline must open with a $match stage so the predicate is applied
+        (and the index chosen) before any reshaping; a leading $project/$group
+        would force MongoDB to scan the whole collection.
+        
+        Args:
+            collection: Name of the collection to read from.
+            pipeline: List of aggregation stages, starting with $match.
+            batch_size: Number of result documents per cursor batch
+                        (defaults per collection, see DEFAULT_BATCH_SIZES).
+            allow_disk_use: Let $group/$sort spill past the 100MB stage memory limit.
+        """
+        if not pipeline or "$match" not in pipeline[0]:
+            first_stage = next(iter(pipeline[0]), None) if pipeline else None
+            raise ValueError(
+                f"Aggregation pipeline must start with a $match stage (got {first_stage}); "
+                "a leading reshaping stage disables index use."
+            )
+
+        if batch_size is None:
+            batch_size = DEFAULT_BATCH_SIZES.get(collection, FALLBACK_BATCH_SIZE)
+
+        options: Dict[str, Any] = {"batchSize": batch_size, "allowDiskUse": allow_disk_use}
+        if self.max_time_ms is not None:
+            options["maxTimeMS"] = self.max_time_ms
+
+        cursor = self.db[collection].aggregate(pipeline, **options)
         
         for document in cursor:
-            yield document
\ No newline at end of file
+            yield document
@@ -1,6 +1,35 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Iterator, Dict, Any
-from src.extract.base_extractor import MongoExtractor
+from src.extract.base_extractor import MongoExtractor, build_timerange_match
+
+# Projections are fixed per collection, so they are built once at import
+# instead of on every call. Exclude MongoDB internal _id, include only schema fields.
+# Treat as read-only: the same dict is passed to every query.
+WATER_READING_PROJECTION = {
+    "_id": 0,
+    "well_id": 1,
+    "region_id": 1,
+    "timestamp": 1,
+    "water_level": 1,
+    "source": 1
+}
+
+RAINFALL_PROJECTION = {
+    "_id": 0,
+    "region_id": 1,
+    "timestamp": 1,
+    "amount_mm": 1,
+    "source": 1
+}
+
+REGION_PROJECTION = {
+    "_id": 0,
+    "region_id": 1,
+    "name": 1,
+    "state": 1,
+    "critical_level": 1,
+    "is_active": 1
+}
 
 class ServiceAAdapter:
     """
@@ -18,23 +47,59 @@ class ServiceAAdapter:
         Reflects Schema:
         - well_id, region_id, timestamp, water_level, source
         """
-        query = {
-            "timestamp": {
-                "$gte": start_date,
-                "$lt": end_date
-            }
-        }
-        # Exclude MongoDB internal _id, include only schema fields
-        projection = {
-            "_id": 0,
-            "well_id": 1,
-            "region_id": 1,
-            "timestamp": 1,
-            "water_level": 1,
-            "source": 1
-        }
+        query = build_timerange_match("timestamp", start_date, end_date)
+        return self.extractor.fetch_batch("water_readings", query, WATER_READING_PROJECTION)
+
+    def fetch_water_readings_daily(self, start_date: datetime, end_date: datetime) -> Iterator[Dict[str, Any]]:
+        """
+        Fetches daily groundwater statistics per region, aggregated inside MongoDB.
+        
+        Server-side equivalent of clean_water_reading_row + aggregate_daily_groundwater:
+        one row per (region, day) instead of every raw reading.
         
-        return self.extractor.fetch_batch("water_readings", query, projection)
+        Pipeline order matters:
+        1. $match on the timestamp range plus the cleaning rules
+           (well_id/region_id present, numeric water_level); leading, so the
+           planner can pick whichever timestamp index the collection has.
+        2. $group per (region, day) -> mean/min/max, count, distinct wells.
+        3. $project into the partial DailyRegionGroundwater shape.
+        
+        Requires MongoDB 5.0+ ($dateTrunc).
+        """
+        pipeline = [
+            {"$match": {
+                **build_timerange_match("timestamp", start_date, end_date),
+                "well_id": {"$nin": [None, ""]},
+                "region_id": {"$nin": [None, ""]},
+                "water_level": {"$type": "number"}
+            }},
+            {"$group": {
+                "_id": {
+                    "region_id": {"$toString": "$region_id"},
+                    "date": {"$dateTrunc": {"date": "$timestamp", "unit": "day", "timezone": "UTC"}}
+                },
+                "avg": {"$avg": "$water_level"},
+                "min": {"$min": "$water_level"},
+                "max": {"$max": "$water_level"},
+                "count": {"$sum": 1},
+                "wells": {"$addToSet": {"$toString": "$well_id"}}
+            }},
+            {"$project": {
+                "_id": 0,
+                "region_id": "$_id.region_id",
+                "date": "$_id.date",
+                "avg_water_level": {"$round": ["$avg", 2]},
+                "min_water_level": {"$round": ["$min", 2]},
+                "max_water_level": {"$round": ["$max", 2]},
+                "reading_count": "$count",
+                "reporting_wells_count": {"$size": "$wells"}
+            }}
+        ]
+        
+        for row in self.extractor.aggregate("water_readings", pipeline):
+            # BSON dates decode naive; downstream compares against UTC-aware keys
+            row["date"] = row["date"].replace(tzinfo=timezone.utc)
+            yield row
 
     def fetch_rainfall(self, start_date: datetime, end_date: datetime) -> Iterator[Dict[str, Any]]:
         """
@@ -43,21 +108,71 @@ class ServiceAAdapter:
         Reflects Schema:
         - region_id, timestamp, amount_mm, source
         """
-        query = {
-            "timestamp": {
-                "$gte": start_date,
-                "$lt": end_date
-            }
-        }
-        projection = {
-            "_id": 0,
-            "region_id": 1,
-            "timestamp": 1,
-            "amount_mm": 1,
-            "source": 1
-        }
+        query = build_timerange_match("timestamp", start_date, end_date)
+        return self.extractor.fetch_batch("rainfall", query, RAINFALL_PROJECTION)
+
+    def fetch_rainfall_daily(self, start_date: datetime, end_date: datetime) -> Iterator[Dict[str, Any]]:
+        """
+        Fetches daily rainfall totals per region, aggregated inside MongoDB.
+        
+        Server-side equivalent of clean_rainfall_row + aggregate_daily_rainfall:
+        only one pre-aggregated row per (region, day) crosses the wire.
+        
+        Pipeline order matters:
+        1. $match on the timestamp range plus the cleaning rules
+           (region_id present, amount_mm >= 0); leading, so the planner can
+           pick whichever timestamp index the collection has. Never put
+           $project before it.
+        2. $group per (region, day, source) -> counts for the primary source.
+        3. $sort + $group per (region, day) -> totals, max, first (= modal) source.
+        4. $project into the DailyRegionRainfall shape.
+        
+        Requires MongoDB 5.0+ ($dateTrunc).
+        """
+        day = {"$dateTrunc": {"date": "$timestamp", "unit": "day", "timezone": "UTC"}}
+        pipeline = [
+            {"$match": {
+                **build_timerange_match("timestamp", start_date, end_date),
+                "region_id": {"$nin": [None, ""]},
+                "amount_mm": {"$gte": 0}
+            }},
+            {"$group": {
+                "_id": {
+                    "region_id": {"$toString": "$region_id"},
+                    "date": day,
+                    "source": {"$toString": {"$ifNull": ["$source", "unknown"]}}
+                },
+                "total": {"$sum": "$amount_mm"},
+                "max": {"$max": "$amount_mm"},
+                "count": {"$sum": 1}
+            }},
+            # Most frequent source first; ties broken alphabetically (same as pandas mode)
+            {"$sort": {"_id.region_id": 1, "_id.date": 1, "count": -1, "_id.source": 1}},
+            {"$group": {
+                "_id": {"region_id": "$_id.region_id", "date": "$_id.date"},
+                "total": {"$sum": "$total"},
+                "max": {"$max": "$max"},
+                "count": {"$sum": "$count"},
+                "primary_source": {"$first": "$_id.source"},
+                "data_sources": {"$push": "$_id.source"}
+            }},
+            {"$project": {
+                "_id": 0,
+                "region_id": "$_id.region_id",
+                "date": "$_id.date",
+                "total_rainfall_mm": {"$round": ["$total", 2]},
+                "max_single_reading_mm": {"$round": ["$max", 2]},
+                "rainfall_intensity_mm": {"$round": [{"$divide": ["$total", "$count"]}, 2]},
+                "unique_source_count": {"$size": "$data_sources"},
+                "primary_source": 1,
+                "data_sources": 1
+            }}
+        ]
         
-        return self.extractor.fetch_batch("rainfall", query, projection)
+        for row in self.extractor.aggregate("rainfall", pipeline):
+            # BSON dates decode naive; downstream compares against UTC-aware keys
+            row["date"] = row["date"].replace(tzinfo=timezone.utc)
+            yield row
 
     def fetch_regions(self, active_only: bool = False) -> Iterator[Dict[str, Any]]:
         """
@@ -69,14 +184,5 @@ class ServiceAAdapter:
         query = {}
         if active_only:
             query["is_active"] = True
-            
-        projection = {
-            "_id": 0,
-            "region_id": 1,
-            "name": 1,
-            "state": 1,
-            "critical_level": 1,
-            "is_active": 1
-        }
         
-        return self.extractor.fetch_batch("regions", query, projection)
\ No newline at end of file
+        return self.extractor.fetch_batch("regions", query, REGION_PROJECTION)
\ No newline at end of file
@@ -2,11 +2,12 @@ import os
 import json
 import pickle
 import logging
+import functools
 import pandas as pd
 import numpy as np
-from datetime import timedelta
 from typing import List, Dict, Any
 
+from pymongo import ReplaceOne
 from src.config.mongo_client import mongo_client
 
 # Configure Logger
@@ -28,42 +29,6 @@ FEATURES = [
     'feat_cos_day'
 ]
 
-def load_active_models() -> Dict[str, str]:
-    """
-    Loads the registry and maps region_id -> artifact_path strictly for ACTIVE models.
-    
-    Constraints:
-    - Must load from registry.json (Single Source of Truth)
-    - Must filter by status="active"
-    - Must fail fast if no models are available
-    """
-    if not os.path.exists(REGISTRY_PATH):
-        # Fail Fast: If registry is missing, the system is in an invalid state.
-        raise FileNotFoundError(f"🚨 CRITICAL: Registry not found at {REGISTRY_PATH}. Cannot perform inference.")
-        
-    try:
-        with open(REGISTRY_PATH, 'r') as f:
-            registry = json.load(f)
-    except json.JSONDecodeError as e:
-        raise ValueError(f"🚨 CRITICAL: Corrupted registry file. {e}")
-
-    # Filter: Select ONLY active models
-    # This prevents loading 'staged', 'archived', or 'rejected' models
-    active_models = [
-        entry for entry in registry 
-        if entry.get('status') == 'active'
-    ]
-    
-    if not active_models:
-        # Fail Fast: Running inference with 0 models is likely a pipeline error
-        raise RuntimeError("🚨 CRITICAL: Registry exists but contains NO 'active' models. Aborting.")
-
-    # Create optimized lookup map
-    model_map = {entry['region_id']: entry['artifact_path'] for entry in active_models}
-    
-    logging.info(f"✅ Loaded {len(model_map)} active models from registry.")
-    return model_map
-
 def load_model_registry() -> Dict[str, str]:
     """
     Loads the registry and maps region_id -> artifact_path.
@@ -78,40 +43,94 @@ def load_model_registry() -> Dict[str, str]:
     # Create a map for quick lookup: region_id -> full_artifact_path
     return {entry['region_id']: entry['artifact_path'] for entry in registry}
 
-def get_latest_features(region_ids: List[str]) -> pd.DataFrame:
+@functools.lru_cache(maxsize=None)
+def load_model_artifact(artifact_path: str) -> Any:
+    """
+    Unpickles a model artifact once per process.
+    
+    Keyed by path: artifacts are immutable (training refuses to overwrite, and
+    every run writes a new timestamped file), so a promotion changes the path
+    in the registry and can never be served a stale model from this cache.
+    """
+    with open(artifact_path, 'rb') as f:
+        model = pickle.load(f)
+
+    # Models are fitted on a DataFrame of FEATURES; inference feeds a plain
+    # ndarray in the same column order, so verify the order once here and drop
+    # the stored names (sklearn would otherwise warn on every predict call).
+    fitted_names = getattr(model, 'feature_names_in_', None)
+    if fitted_names is not None:
+        if list(fitted_names) != FEATURES:
+            raise ValueError(
+                f"🚨 Model {artifact_path} was trained on {list(fitted_names)}, expected {FEATURES}."
+            )
+        del model.feature_names_in_
+
+    return model
+
+# Stored inputs the forecast loop reads from each region's latest feature row
+# (seasonality is recomputed per forecast date, so it is not fetched)
+LATEST_INPUT_FEATURES = [
+    'feat_rainfall_1d_lag',
+    'feat_rainfall_7d_sum',
+    'feat_water_trend_7d'
+]
+
+def get_latest_features(region_ids: List[str]) -> Dict[str, Any]:
     """
     Fetches the most recent feature row for each requested region.
+    
+    Returns column arrays (one entry per region, same order in every column):
+    'region_id', 'date' (pd.Timestamp) and each of LATEST_INPUT_FEATURES as
+    float64 (missing values -> NaN). Empty dict if no rows were found.
     """
     db = mongo_client.get_olap_db()
     
-    # We use an aggregation to get the 'max' date document per region
+    # We use an aggregation to get the 'max' date document per region.
+    # One round-trip for all regions; sorting on the full (region_id, date)
+    # key lets the server walk the { region_id: 1, date: 1 } index backwards
+    # and jump straight to each region's newest entry (DISTINCT_SCAN) instead
+    # of sorting every feature row in memory.
     pipeline = [
         {"$match": {"region_id": {"$in": region_ids}}},
-        {"$sort": {"date": -1}},
+        {"$sort": {"region_id": -1, "date": -1}},
         {"$group": {
             "_id": "$region_id",
             "latest_doc": {"$first": "$$ROOT"}
         }},
-        {"$replaceRoot": {"newRoot": "$latest_doc"}}
+        {"$replaceRoot": {"newRoot": "$latest_doc"}},
+        # Ship only what inference reads
+        {"$project": {"_id": 0, "region_id": 1, "date": 1, **{f: 1 for f in LATEST_INPUT_FEATURES}}}
     ]
     
     docs = list(db.region_feature_store.aggregate(pipeline))
     
     if not docs:
-        return pd.DataFrame()
+        return {}
         
-    df = pd.DataFrame(docs)
-    df['date'] = pd.to_datetime(df['date'])
-    return df
+    # Built straight from the documents: no intermediate DataFrame
+    columns = {
+        "region_id": np.array([d["region_id"] for d in docs], dtype=object),
+        "date": [pd.Timestamp(d["date"]) for d in docs]
+    }
+    for feature in LATEST_INPUT_FEATURES:
+        columns[feature] = np.array([d.get(feature) for d in docs], dtype=np.float64)
+    return columns
+
+# Seasonality only depends on day-of-year (1..366), so the whole table is
+# computed once at import; index with [day_of_year - 1].
+_DAY_OF_YEAR = np.arange(1, 367)
+SIN_DAY_TABLE = np.sin(2 * np.pi * _DAY_OF_YEAR / 365.0)
+COS_DAY_TABLE = np.cos(2 * np.pi * _DAY_OF_YEAR / 365.0)
 
 def generate_seasonality_features(date: pd.Timestamp) -> Dict[str, float]:
     """
     Calculates deterministic seasonality features for a given date.
     """
-    day_of_year = date.dayofyear
+    day_index = date.dayofyear - 1
     return {
-        "feat_sin_day": np.sin(2 * np.pi * day_of_year / 365.0),
-        "feat_cos_day": np.cos(2 * np.pi * day_of_year / 365.0)
+        "feat_sin_day": SIN_DAY_TABLE[day_index],
+        "feat_cos_day": COS_DAY_TABLE[day_index]
     }
 
 def run_inference():
@@ -130,63 +149,82 @@ def run_inference():
 
             # 2. Fetch Latest Features
             active_regions = list(model_map.keys())
-            latest_df = get_latest_features(active_regions)
+            latest = get_latest_features(active_regions)
             
-            if latest_df.empty:
+            if not latest:
                 logger.warning("⚠️ No feature data found. Skipping inference.")
                 return
 
             forecasts = []
-            logger.info(f"🔮 Generating {FORECAST_HORIZON_DAYS}-day forecasts for {len(latest_df)} regions...")
+            # One run timestamp shared by every record (tz-aware UTC, as before)
+            created_at = pd.Timestamp.utcnow().to_pydatetime()
+            logger.info(f"🔮 Generating {FORECAST_HORIZON_DAYS}-day forecasts for {len(latest['region_id'])} regions...")
+
+            # Column arrays (struct-of-arrays); the loops below index these
+            # instead of materializing an object per row
+            region_col = latest['region_id']
+            date_col = latest['date']
+            rain_1d_col = latest['feat_rainfall_1d_lag']
+            rain_7d_col = latest['feat_rainfall_7d_sum']
+            trend_col = latest['feat_water_trend_7d']
 
-            for _, row in latest_df.iterrows():
-                region_id = row['region_id']
+            # Group region positions by model artifact, so each model predicts
+            # once for all of its regions and horizon steps
+            rows_by_artifact: Dict[str, List[int]] = {}
+            for pos, region_id in enumerate(region_col):
                 artifact_path = model_map.get(region_id)
                 
                 if not artifact_path or not os.path.exists(artifact_path):
                     continue
                     
-                with open(artifact_path, 'rb') as f:
-                    model = pickle.load(f)
-
-                current_date = row['date']
-                current_trend = row['feat_water_trend_7d']
-                future_rain_1d = 0.0
-                future_rain_7d = 0.0 
-
-                for i in range(1, FORECAST_HORIZON_DAYS + 1):
-                    raw_date = current_date + timedelta(days=i)
-                    # Normalize to Midnight UTC
-                    forecast_date = raw_date.normalize().to_pydatetime()
-                    
-                    seasonality = generate_seasonality_features(raw_date)
-                    
-                    if i == 1:
-                        input_vector = np.array([[
-                            row['feat_rainfall_1d_lag'],
-                            row['feat_rainfall_7d_sum'],
-                            row['feat_water_trend_7d'],
-                            seasonality['feat_sin_day'],
-                            seasonality['feat_cos_day']
-                        ]])
-                    else:
-                        input_vector = np.array([[
-                            future_rain_1d,    
-                            future_rain_7d,    
-                            current_trend,     
-                            seasonality['feat_sin_day'],
-                            seasonality['feat_cos_day']
-                        ]])
-                    
-                    input_df = pd.DataFrame(input_vector, columns=FEATURES)
-                    prediction = model.predict(input_df)[0]
-                    
+                rows_by_artifact.setdefault(artifact_path, []).append(pos)
+
+            for artifact_path, positions in rows_by_artifact.items():
+                model = load_model_artifact(artifact_path)
+                idx = np.asarray(positions)
+
+                # One input row per (region, horizon step), in FEATURES order.
+                # The recursive inputs never depend on an earlier prediction
+                # (future rain is assumed 0, the trend is carried forward),
+                # so every step can be scored in the same predict call.
+                input_matrix = np.empty((len(idx) * FORECAST_HORIZON_DAYS, len(FEATURES)), dtype=np.float64)
+
+                # Rain/trend columns filled as whole-array slices on a
+                # (region, step, feature) view instead of per-step scalar writes:
+                # T+1 uses the observed lags, T+2.. assume no future rain.
+                steps_view = input_matrix.reshape(len(idx), FORECAST_HORIZON_DAYS, len(FEATURES))
+                steps_view[:, 0, 0] = rain_1d_col[idx]
+                steps_view[:, 0, 1] = rain_7d_col[idx]
+                steps_view[:, 1:, 0:2] = 0.0
+                steps_view[:, :, 2] = trend_col[idx, np.newaxis]
+
+                # Forecast dates for every (region, step) row as one DatetimeIndex:
+                # midnight of each region's last date + 1..HORIZON days.
+                # Seasonality then becomes a single table lookup per column.
+                horizon_steps = np.arange(1, FORECAST_HORIZON_DAYS + 1)
+                base_dates = pd.DatetimeIndex([date_col[pos] for pos in positions]).normalize()
+                forecast_dates = base_dates.repeat(FORECAST_HORIZON_DAYS) + pd.to_timedelta(
+                    np.tile(horizon_steps, len(positions)), unit='D'
+                )
+                day_index = forecast_dates.dayofyear.to_numpy() - 1
+                input_matrix[:, 3] = SIN_DAY_TABLE[day_index]
+                input_matrix[:, 4] = COS_DAY_TABLE[day_index]
+
+                forecast_keys = zip(
+                    region_col[idx].repeat(FORECAST_HORIZON_DAYS),
+                    forecast_dates.to_pydatetime(),
+                    np.tile(horizon_steps, len(positions))
+                )
+
+                predictions = model.predict(input_matrix)
+
+                for (region_id, forecast_date, i), prediction in zip(forecast_keys, predictions):
                     forecasts.append({
                         "region_id": region_id,
                         "forecast_date": forecast_date,
                         "predicted_level": float(round(prediction, 4)), # Ensure float for BSON
                         "model_version": "v1.0-linear-baseline",
-                        "created_at": pd.Timestamp.utcnow().to_pydatetime(), # Ensure python datetime
+                        "created_at": created_at,
                         "horizon_step": int(i) # Ensure int
                     })
 
@@ -202,19 +240,27 @@ def run_inference():
                 # ---------------------
                 
                 # IDEMPOTENCY FIX
+                # One upsert per (region_id, forecast_date): re-runs replace the
+                # previous forecast in place, in a single round-trip, without
+                # the delete-then-insert window where readers saw no forecast.
+                # Lookups use the unique { region_id: 1, forecast_date: 1 } index,
+                # which also guarantees a key can never be inserted twice.
                 region_ids = list(set(f['region_id'] for f in forecasts))
-                forecast_dates = list(set(f['forecast_date'] for f in forecasts))
-                
-                logger.info(f"🧹 Clearing overlapping forecasts...")
-                delete_result = collection.delete_many({
-                    "region_id": {"$in": region_ids},
-                    "forecast_date": {"$in": forecast_dates}
-                })
-                logger.info(f"   - Removed {delete_result.deleted_count} stale records.")
+                operations = [
+                    ReplaceOne(
+                        {"region_id": f["region_id"], "forecast_date": f["forecast_date"]},
+                        f,
+                        upsert=True
+                    )
+                    for f in forecasts
+                ]
 
-                # INSERT
-                result = collection.insert_many(forecasts)
-                logger.info(f"✅ Saved {len(result.inserted_ids)} forecast records.")
+                # Unordered: independent docs, server may apply them in parallel
+                result = collection.bulk_write(operations, ordered=False)
+                logger.info(
+                    f"✅ Saved {len(forecasts)} forecast records "
+                    f"({result.upserted_count} new, {result.modified_count} replaced)."
+                )
                 
                 # --- IMMEDIATE VERIFICATION READ ---
                 logger.info("🕵️ VERIFYING WRITE...")
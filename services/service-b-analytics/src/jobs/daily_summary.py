@@ -1,4 +1,5 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any
 
@@ -10,14 +11,6 @@ from src.extract.base_extractor import MongoExtractor
 from src.extract.service_a_adapter import ServiceAAdapter
 
 # Transform Layer
-from src.transform.cleaning import (
-    clean_water_reading_row, 
-    clean_rainfall_row
-)
-from src.transform.aggregations import (
-    aggregate_daily_groundwater, 
-    aggregate_daily_rainfall
-)
 from src.transform.feature_engineering import generate_region_features
 
 # Load Layer
@@ -36,8 +29,8 @@ def run_daily_pipeline(target_date_str: str):
     
     Flow:
     1. EXTRACT: Fetch raw data (Target Date + 7 days history for lag features).
-    2. CLEAN: Normalize types, handle nulls, fix timestamps.
-    3. AGGREGATE: Group raw data into daily stats.
+    2. CLEAN: Normalize types, handle nulls, fix timestamps (in the $match stage).
+    3. AGGREGATE: Group raw data into daily stats (in MongoDB, same pipeline).
     4. FEATURE: Compute lags, trends, and seasonality.
     5. LOAD: Write final datasets to OLAP collections.
     
@@ -66,52 +59,38 @@ def run_daily_pipeline(target_date_str: str):
         # ------------------------------------------------------------------
         logger.info("🔍 [Step 1/5] Extracting Raw Data...")
         
-        # Fetch Metadata
-        raw_regions = list(adapter.fetch_regions(active_only=True))
+        # Fetch Metadata + Time-Series Data (Windowed) concurrently.
+        # The three cursors are independent and network-bound, so their
+        # round-trips overlap (PyMongo releases the GIL while waiting on I/O).
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            regions_future = pool.submit(lambda: list(adapter.fetch_regions(active_only=True)))
+            # Readings and rainfall are cleaned + aggregated to daily stats inside
+            # MongoDB, so only one row per (region, day) crosses the wire
+            readings_future = pool.submit(lambda: list(adapter.fetch_water_readings_daily(history_start, next_day)))
+            rainfall_future = pool.submit(lambda: list(adapter.fetch_rainfall_daily(history_start, next_day)))
+
+        raw_regions = regions_future.result()
+        agg_groundwater = readings_future.result()
+        agg_rainfall = rainfall_future.result()
+
         # Convert to Lookup Dict for Feature Engineering: {id: critical_level}
         region_critical_map = {
             r["region_id"]: r.get("critical_level", 0.0) 
             for r in raw_regions
         }
         
-        # Fetch Time-Series Data (Windowed)
-        raw_readings = list(adapter.fetch_water_readings(history_start, next_day))
-        raw_rainfall = list(adapter.fetch_rainfall(history_start, next_day))
-        
         logger.info(
             f"   - Fetched {len(raw_regions)} Regions, "
-            f"{len(raw_readings)} Readings, "
-            f"{len(raw_rainfall)} Rainfall records."
+            f"{len(agg_groundwater)} Daily GW aggregates, "
+            f"{len(agg_rainfall)} Daily Rainfall aggregates."
         )
 
-        # 3. CLEAN (Pure Functions)
+        # 3-4. CLEAN + AGGREGATE (pushed down into the extract pipelines)
         # ------------------------------------------------------------------
-        logger.info("🧹 [Step 2/5] Cleaning Data...")
-        
-        cleaned_readings = []
-        for r in raw_readings:
-            res = clean_water_reading_row(r)
-            if res is not None:
-                cleaned_readings.append(res)
-        
-        cleaned_rainfall = []
-        for r in raw_rainfall:
-            res = clean_rainfall_row(r)
-            if res is not None:
-                cleaned_rainfall.append(res)
-        
-        logger.info(
-            f"   - Cleaned: {len(cleaned_readings)} Readings, "
-            f"{len(cleaned_rainfall)} Rainfall records."
-        )
-
-        # 4. AGGREGATE (Pure Functions)
-        # ------------------------------------------------------------------
-        logger.info("∑  [Step 3/5] Aggregating Daily Stats...")
-        
-        # Generate Daily Stats for the whole window (needed for features)
-        agg_groundwater = aggregate_daily_groundwater(cleaned_readings)
-        agg_rainfall = aggregate_daily_rainfall(cleaned_rainfall)
+        # The cleaning rules and daily grouping run inside MongoDB
+        # (see ServiceAAdapter.fetch_*_daily); the history window is kept
+        # in memory for Step 4.
+        logger.info("∑  [Step 2-3/5] Daily Stats aggregated server-side.")
         
         # Filter: We only want to LOAD the data for the specific target_date
         # (But we keep the full history in memory for Step 4)
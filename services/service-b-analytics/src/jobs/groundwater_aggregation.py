@@ -156,7 +156,9 @@ def run_groundwater_aggregation(target_date_str: str):
 
     # 7. Batch Write (Write to Service B)
     if bulk_ops:
-        result = olap_db.daily_region_groundwater.bulk_write(bulk_ops)
+        # Upserts target distinct (region_id, date) keys, so order is irrelevant:
+        # unordered lets the server apply the batch without stopping at the first error
+        result = olap_db.daily_region_groundwater.bulk_write(bulk_ops, ordered=False)
         logger.info(f"✅ Write Complete: {result.upserted_count} inserted, {result.modified_count} updated.")
     else:
         logger.info("No data to process for this date.")
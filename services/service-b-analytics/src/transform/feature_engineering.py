@@ -45,50 +45,47 @@ def generate_region_features(
         how='inner'
     )
 
-    # 3. Apply Feature Engineering per Region
-    # We use groupby().apply() to ensure lags don't cross region boundaries
-    def apply_transformations(group):
-        # Sort by date asc to ensure correct rolling/shifting
-        group = group.sort_values('date')
-        
-        # --- Target ---
-        # The value we want to predict for this Date
-        group['target_water_level'] = group['avg_water_level']
+    # 3. Feature Engineering per Region
+    # Grouped shift/rolling run over whole columns (no Python call per region);
+    # grouping keeps lags from crossing region boundaries.
+    # Sort by region, then date asc, to ensure correct rolling/shifting
+    features_df = merged_df.sort_values(['region_id', 'date'], ignore_index=True)
+    by_region = features_df.groupby('region_id', sort=False)
 
-        # --- Rainfall Lags (No Target Leakage) ---
-        # feat_rainfall_1d_lag: Rain yesterday (T-1)
-        group['feat_rainfall_1d_lag'] = group['total_rainfall_mm'].shift(1)
-        
-        # feat_rainfall_3d_sum: Sum of rain from T-3 to T-1
-        # Shift(1) first ensures we only look at yesterday backwards
-        group['feat_rainfall_3d_sum'] = group['total_rainfall_mm'].shift(1).rolling(window=3).sum()
-        
-        # feat_rainfall_7d_sum: Sum of rain from T-7 to T-1
-        group['feat_rainfall_7d_sum'] = group['total_rainfall_mm'].shift(1).rolling(window=7).sum()
+    # --- Target ---
+    # The value we want to predict for this Date
+    features_df['target_water_level'] = features_df['avg_water_level']
 
-        # --- Water Level Trend (No Target Leakage) ---
-        # feat_water_trend_7d: Difference between T-1 and T-8
-        # This represents the trend leading UP TO the prediction day, without seeing the prediction day.
-        # Safe for ML.
-        prev_day = group['avg_water_level'].shift(1)
-        prev_week = group['avg_water_level'].shift(8)
-        group['feat_water_trend_7d'] = prev_day - prev_week
+    # --- Rainfall Lags (No Target Leakage) ---
+    # feat_rainfall_1d_lag: Rain yesterday (T-1)
+    rain_prev = by_region['total_rainfall_mm'].shift(1)
+    features_df['feat_rainfall_1d_lag'] = rain_prev
 
-        # --- Seasonality ---
-        # Extract Day of Year (1-366)
-        day_of_year = group['date'].dt.dayofyear
-        group['day_of_year'] = day_of_year
-        
-        # Cyclical Encoding (Sin/Cos)
-        # 365.25 accounts for leap years roughly, but 365.0 is standard for simple robust features
-        group['feat_sin_day'] = np.sin(2 * np.pi * day_of_year / 365.0)
-        group['feat_cos_day'] = np.cos(2 * np.pi * day_of_year / 365.0)
+    # feat_rainfall_3d_sum: Sum of rain from T-3 to T-1
+    # Shift(1) first ensures we only look at yesterday backwards
+    rain_prev_by_region = rain_prev.groupby(features_df['region_id'], sort=False)
+    features_df['feat_rainfall_3d_sum'] = rain_prev_by_region.rolling(window=3).sum().droplevel(0)
+
+    # feat_rainfall_7d_sum: Sum of rain from T-7 to T-1
+    features_df['feat_rainfall_7d_sum'] = rain_prev_by_region.rolling(window=7).sum().droplevel(0)
+
+    # --- Water Level Trend (No Target Leakage) ---
+    # feat_water_trend_7d: Difference between T-1 and T-8
+    # This represents the trend leading UP TO the prediction day, without seeing the prediction day.
+    # Safe for ML.
+    prev_day = by_region['avg_water_level'].shift(1)
+    prev_week = by_region['avg_water_level'].shift(8)
+    features_df['feat_water_trend_7d'] = prev_day - prev_week
 
-        return group
+    # --- Seasonality ---
+    # Extract Day of Year (1-366)
+    day_of_year = features_df['date'].dt.dayofyear
+    features_df['day_of_year'] = day_of_year
 
-    # Apply logic group-wise
-    features_df = merged_df.groupby('region_id', include_groups=False).apply(apply_transformations)
-    features_df = features_df.reset_index()
+    # Cyclical Encoding (Sin/Cos)
+    # 365.25 accounts for leap years roughly, but 365.0 is standard for simple robust features
+    features_df['feat_sin_day'] = np.sin(2 * np.pi * day_of_year / 365.0)
+    features_df['feat_cos_day'] = np.cos(2 * np.pi * day_of_year / 365.0)
     
     # 4. Enforce Metadata Features (Denormalization)
     # Map critical levels. If missing, use a safe default or drop (here we drop to be safe)
@@ -98,7 +95,7 @@ def generate_region_features(
     # 5. Clean Up
     # Drop rows with NaN (caused by shifting/rolling at the start of history)
     # Drop rows where critical_level mapping failed
-    features_df = features_df.dropna()
+    features_df = features_df.dropna().reset_index(drop=True)
 
     # 6. Formatting Output
     output_cols = [
@@ -3,6 +3,7 @@ from unittest.mock import MagicMock
 from datetime import datetime, timedelta, timezone
 from src.extract.service_a_adapter import ServiceAAdapter
 from src.extract.base_extractor import MongoExtractor
+from src.config.mongo_client import EXTRACT_MAX_TIME_MS, MONGO_CLIENT_OPTIONS
 
 class TestServiceAAdapter(unittest.TestCase):
     
@@ -55,5 +56,76 @@ class TestServiceAAdapter(unittest.TestCase):
         query = args[1]
         self.assertEqual(query, {"is_active": True})
 
+    def test_fetch_rainfall_daily_pipeline_order(self):
+        """
+        Verify the rainfall aggregation filters first ($match on timestamp)
+        and returns UTC-aware day keys.
+        """
+        start = self.test_date
+        end = self.test_date + timedelta(days=1)
+        self.mock_extractor.aggregate.return_value = iter([
+            {"region_id": "R1", "date": datetime(2024, 1, 1), "total_rainfall_mm": 4.5}
+        ])
+
+        rows = list(self.adapter.fetch_rainfall_daily(start, end))
+
+        collection, pipeline = self.mock_extractor.aggregate.call_args[0]
+        self.assertEqual(collection, "rainfall")
+        self.assertEqual(list(pipeline[0]), ["$match"])
+        self.assertEqual(pipeline[0]["$match"]["timestamp"], {"$gte": start, "$lt": end})
+        self.assertIn("$project", pipeline[-1])
+        self.assertEqual(rows[0]["date"], self.test_date)
+
+    def test_fetch_water_readings_daily_filters_first(self):
+        """
+        Verify the groundwater aggregation filters first and forces no index
+        (the Service A index may live on a differently named collection).
+        """
+        self.mock_extractor.aggregate.return_value = iter([])
+
+        list(self.adapter.fetch_water_readings_daily(self.test_date, self.test_date + timedelta(days=1)))
+
+        args, kwargs = self.mock_extractor.aggregate.call_args
+        self.assertEqual(args[0], "water_readings")
+        self.assertEqual(list(args[1][0]), ["$match"])
+        self.assertNotIn("hint", kwargs)
+
+class TestMongoExtractor(unittest.TestCase):
+
+    def test_aggregate_requires_leading_match(self):
+        """
+        A pipeline that reshapes before filtering is rejected.
+        """
+        extractor = MongoExtractor(MagicMock())
+        with self.assertRaises(ValueError):
+            list(extractor.aggregate("rainfall", [{"$project": {"_id": 0}}]))
+
+    def test_fetch_batch_sets_server_time_limit(self):
+        """
+        find() cursors carry the server-side maxTimeMS budget.
+        """
+        db = MagicMock()
+        cursor = db["water_readings"].find.return_value.batch_size.return_value
+        cursor.max_time_ms.return_value = iter([])
+        extractor = MongoExtractor(db, max_time_ms=1234)
+
+        list(extractor.fetch_batch("water_readings", {}))
+
+        cursor.max_time_ms.assert_called_once_with(1234)
+
+    def test_aggregate_sets_server_time_limit(self):
+        """
+        Aggregations pass maxTimeMS, defaulting to a budget below the socket timeout.
+        """
+        db = MagicMock()
+        db["rainfall"].aggregate.return_value = iter([])
+        extractor = MongoExtractor(db)
+
+        list(extractor.aggregate("rainfall", [{"$match": {}}]))
+
+        _, kwargs = db["rainfall"].aggregate.call_args
+        self.assertEqual(kwargs["maxTimeMS"], EXTRACT_MAX_TIME_MS)
+        self.assertLess(kwargs["maxTimeMS"], MONGO_CLIENT_OPTIONS["socketTimeoutMS"])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -38,6 +38,10 @@ def get_venv_python(service_dir: Path) -> str:
 # The absolute path to Service B's Python executable
 SERVICE_B_PYTHON = get_venv_python(SERVICE_B_DIR)
 
+# --- Scheduling ---
+# Daily in-process pipeline run, as "HH:MM" in UTC (e.g. "02:00"). Empty = disabled.
+PIPELINE_DAILY_RUN_UTC = os.getenv("PIPELINE_DAILY_RUN_UTC", "").strip()
+
 # Validation
 if not SERVICE_B_DIR.exists():
     raise FileNotFoundError(f"CRITICAL: Service B directory not found at {SERVICE_B_DIR}")
\ No newline at end of file
@@ -1,11 +1,33 @@
+import asyncio
+import atexit
 import logging
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from datetime import datetime, timedelta, timezone
+from logging.handlers import QueueHandler, QueueListener
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
+from config.settings import PIPELINE_DAILY_RUN_UTC
 from orchestrator import run_pipeline
 
 # Configure Logging
-logging.basicConfig(level=logging.INFO)
+# Request paths only enqueue records; a background listener thread performs the
+# blocking stderr write (same output format as logging.basicConfig).
+_log_queue = queue.SimpleQueue()
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+_log_listener = QueueListener(_log_queue, _stream_handler)
+
+root_logger = logging.getLogger()
+root_logger.addHandler(QueueHandler(_log_queue))
+root_logger.setLevel(logging.INFO)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logger = logging.getLogger("api")
 
 # --- Global State (Simple In-Memory Lock) ---
@@ -16,34 +38,146 @@ pipeline_state = {
     "last_run_time": None
 }
 
-def pipeline_wrapper():
+# Single-flight guard: claimed when a run is dispatched (not when its thread
+# starts), so back-to-back triggers cannot queue a duplicate run.
+_pipeline_run_lock = threading.Lock()
+
+def claim_pipeline_run() -> bool:
+    """
+    Atomically marks the pipeline as running. False if a run is already in flight.
+    """
+    if not _pipeline_run_lock.acquire(blocking=False):
+        return False
+    pipeline_state["is_running"] = True
+    return True
+
+def release_pipeline_run(job: dict, error: Exception):
+    """
+    Undoes claim_pipeline_run() when the run could not be handed to the executor
+    (e.g. it was already shut down), so later triggers are not locked out.
+    """
+    pipeline_state["is_running"] = False
+    _pipeline_run_lock.release()
+    job["status"] = "failed"
+    job["error"] = f"Dispatch failed: {error}"
+    job["finished_at"] = datetime.now(timezone.utc)
+
+# --- Pipeline Executor ---
+# Dedicated single-slot pool for pipeline runs. The heavy lifting happens in
+# Service B subprocesses, so a thread is enough to keep the event loop free
+# without borrowing a slot from the threadpool that serves the sync endpoints.
+PIPELINE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline")
+
+# --- Job Registry ---
+# Submitted runs keyed by job_id so clients can poll instead of waiting.
+# In-memory only: history is lost on restart. Bounded to the most recent runs.
+MAX_TRACKED_JOBS = 50
+pipeline_jobs: "OrderedDict[str, dict]" = OrderedDict()
+
+def register_job() -> dict:
+    """
+    Creates a 'queued' job record and evicts the oldest entries beyond the cap.
+    """
+    job_id = uuid.uuid4().hex
+    job = {
+        "job_id": job_id,
+        "status": "queued",
+        "submitted_at": datetime.now(timezone.utc),
+        "started_at": None,
+        "finished_at": None,
+        "error": None
+    }
+    pipeline_jobs[job_id] = job
+    while len(pipeline_jobs) > MAX_TRACKED_JOBS:
+        pipeline_jobs.popitem(last=False)
+    return job
+
+def pipeline_wrapper(job: dict):
     """
     Wraps the synchronous orchestrator to manage state flags.
     """
     global pipeline_state
     try:
-        logger.info("🚀 API triggered pipeline execution.")
+        logger.info(f"🚀 API triggered pipeline execution. Job: {job['job_id']}")
         pipeline_state["is_running"] = True
         pipeline_state["last_run_status"] = "running"
+        job["status"] = "running"
+        job["started_at"] = datetime.now(timezone.utc)
         
         # Run the actual heavy-lifting
         run_pipeline()
         
         pipeline_state["last_run_status"] = "success"
-    except Exception as e:
-        logger.error(f"💥 Pipeline failed: {e}")
+        job["status"] = "success"
+    except (Exception, SystemExit) as e:
+        # run_pipeline() exits via sys.exit(1) on failure, so catch SystemExit too.
+        # Its code is just the exit status; report the exception that triggered it.
+        if isinstance(e, SystemExit):
+            error = f"Pipeline aborted: {e.__context__}" if e.__context__ else f"Pipeline exited with status {e.code}"
+        else:
+            error = str(e)
+        logger.error(f"💥 Pipeline failed: {error}")
         pipeline_state["last_run_status"] = "failed"
+        job["status"] = "failed"
+        job["error"] = error
     finally:
+        finished_at = datetime.now(timezone.utc)
         pipeline_state["is_running"] = False
+        pipeline_state["last_run_time"] = finished_at
+        _pipeline_run_lock.release()
+        job["finished_at"] = finished_at
         logger.info("🏁 Pipeline execution finished.")
 
+def seconds_until_daily_run(run_at: str, now: datetime) -> float:
+    """
+    Seconds from 'now' until the next 'HH:MM' (UTC) occurrence.
+    """
+    hour, minute = (int(part) for part in run_at.split(":"))
+    next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+async def daily_pipeline_scheduler(run_at: str):
+    """
+    Fires the pipeline once a day in-process (no external cron / HTTP hop).
+    Runs share the job registry and executor with manual triggers.
+    """
+    while True:
+        await asyncio.sleep(seconds_until_daily_run(run_at, datetime.now(timezone.utc)))
+
+        if not claim_pipeline_run():
+            logger.warning("⏭️ Scheduled run skipped: pipeline is already running.")
+            continue
+
+        job = register_job()
+        logger.info(f"⏰ Scheduled daily pipeline run. Job: {job['job_id']}")
+        try:
+            run = asyncio.get_running_loop().run_in_executor(PIPELINE_EXECUTOR, pipeline_wrapper, job)
+        except Exception as e:
+            release_pipeline_run(job, e)
+            logger.error(f"💥 Scheduled run could not be dispatched: {e}")
+            continue
+        await run
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup logic
     logger.info("Starting Service C Orchestrator API...")
+
+    scheduler_task = None
+    if PIPELINE_DAILY_RUN_UTC:
+        # Fail fast on a malformed schedule instead of inside the background task
+        seconds_until_daily_run(PIPELINE_DAILY_RUN_UTC, datetime.now(timezone.utc))
+        scheduler_task = asyncio.create_task(daily_pipeline_scheduler(PIPELINE_DAILY_RUN_UTC))
+        logger.info(f"⏰ Daily pipeline scheduled at {PIPELINE_DAILY_RUN_UTC} UTC.")
+
     yield
     # Shutdown logic
     logger.info("Shutting down Service C...")
+    if scheduler_task:
+        scheduler_task.cancel()
+    PIPELINE_EXECUTOR.shutdown(wait=False)
 
 app = FastAPI(title="Groundwater Orchestrator", version="1.0.0", lifespan=lifespan)
 
@@ -61,18 +195,38 @@ def get_status():
     return pipeline_state
 
 @app.post("/pipeline/trigger")
-def trigger_pipeline(background_tasks: BackgroundTasks):
+async def trigger_pipeline():
     """
     Manually triggers the groundwater analytics pipeline.
     """
-    if pipeline_state["is_running"]:
+    if not claim_pipeline_run():
         raise HTTPException(status_code=409, detail="Pipeline is already running.")
     
-    # Run in background so the API responds immediately
-    background_tasks.add_task(pipeline_wrapper)
-    return {"message": "Pipeline triggered successfully", "status": "started"}
+    # Run off the event loop so the API responds immediately
+    job = register_job()
+    loop = asyncio.get_running_loop()
+    try:
+        loop.run_in_executor(PIPELINE_EXECUTOR, pipeline_wrapper, job)
+    except Exception as e:
+        release_pipeline_run(job, e)
+        logger.error(f"💥 Pipeline could not be dispatched: {e}")
+        raise HTTPException(status_code=503, detail="Pipeline executor is unavailable.")
+    return {"message": "Pipeline triggered successfully", "status": "started", "job_id": job["job_id"]}
+
+@app.get("/pipeline/jobs/{job_id}")
+def get_job(job_id: str):
+    """
+    Returns the lifecycle of a single triggered run.
+    """
+    job = pipeline_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return job
 
 if __name__ == "__main__":
     import uvicorn
     # Run on port 8100 to avoid conflict with Service A (8000/8001)
-    uvicorn.run(app, host="0.0.0.0", port=8100)
\ No newline at end of file
+    # Single worker by design: job registry, run lock and scheduler live in-process.
+    # uvicorn[standard] supplies uvloop + httptools (picked up by loop/http="auto").
+    # log_config=None routes uvicorn's loggers through the root QueueHandler above.
+    uvicorn.run(app, host="0.0.0.0", port=8100, loop="auto", http="auto", log_config=None)
\ No newline at end of file